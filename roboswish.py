@@ -6,12 +6,36 @@ import requests  # for Ollama API calls
 import threading
 import logging
 import os
-from PyQt5.QtGui import QIcon
+import queue
+import re
+import html
+import hashlib
+import sqlite3
+import math
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from PyQt5.QtGui import QIcon, QTextCursor, QTextCharFormat, QColor, QFont
 try:
     from dotenv import load_dotenv
     load_dotenv()
 except ImportError:
     pass
+try:
+    import numpy as np  # optional, enables the semantic response cache
+except ImportError:
+    np = None
+try:
+    import orjson  # optional, faster JSON for the chat stream and saved files
+    _loads = orjson.loads
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj, indent=2).encode("utf-8")
 
 # Setup debug logging
 logging.basicConfig(
@@ -28,10 +52,43 @@ from PyQt5.QtCore import QTimer, Qt, QThread, pyqtSignal
 
 # Update config loading
 MODES_FILE = "modes.json"
+ONBOARDED_FILE = ".roboswish_onboarded"
 BROWSER_COMMAND = os.environ.get("BROWSER_COMMAND", "google-chrome")
 FOCUS_BURST_SECONDS = 5 * 60
 OLLAMA_API_URL = os.environ.get("OLLAMA_API_URL", "http://localhost:11434/api/chat")
 OLLAMA_MODEL = os.environ.get("OLLAMA_MODEL", "llama2")
+WARM_MODEL = os.environ.get("WARM_MODEL") == "1"
+PRECOMPUTE_EMBEDDINGS = os.environ.get("PRECOMPUTE_EMBEDDINGS") == "1"
+OLLAMA_EMBED_URL = os.environ.get("OLLAMA_EMBED_URL", OLLAMA_API_URL.rsplit("/api/", 1)[0] + "/api/embeddings")
+CACHE_FILE = os.path.expanduser("~/.roboswish_cache.sqlite")
+CACHE_SIMILARITY = 0.92
+PROMPT_CACHE_FILE = os.path.expanduser("~/.roboswish_exact_cache.json")
+PROMPT_CACHE_SIZE = 256
+PRECOMPUTE_INTERVAL_MS = 30 * 1000
+PRECOMPUTE_MAX_CHARS = 2000
+PROBE_CACHE_FILE = os.path.expanduser("~/.roboswish_ollama_probe.json")
+PROBE_CACHE_TTL = 10 * 60
+
+def atomic_write(path, data):
+    """Write bytes to path through a temp file and rename, so a crash never leaves it half-written."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+# Resolved once at import; both windows share one icon
+_ICON_PATH = os.path.join(os.path.dirname(__file__), "public/images/roboswish_angle.png")
+_ICON_EXISTS = os.path.exists(_ICON_PATH)
+_ONBOARDED = os.path.exists(ONBOARDED_FILE)
+_APP_ICON = None
+
+
+def app_icon():
+    """Return the shared window icon, loading the PNG on first use."""
+    global _APP_ICON
+    if _APP_ICON is None:
+        _APP_ICON = QIcon(_ICON_PATH)
+    return _APP_ICON
 
 # Define color themes for modes
 THEMES = {
@@ -40,52 +97,308 @@ THEMES = {
     "Super Focus Burst": {"bg": "#0F1419", "fg": "#00FF88"},
 }
 
+
+def _theme_styles(bg, fg):
+    return {
+        "panel": f"background-color: {bg}; color: {fg};",
+        "title": f"font-size: 20px; font-weight: bold; color: {fg};",
+        "button": f"background-color: #15232e; color: {fg}; padding: 10px;",
+        "timer": f"font-size: 18px; font-weight: bold; color: {fg};",
+        "chat_history": f"background-color: #181818; color: {fg}; padding: 5px;",
+        "chat_input": f"background-color: #222; color: {fg}; padding: 5px;",
+        "send_btn": f"background-color: #004d2e; color: {fg}; padding: 5px;",
+    }
+
+# Stylesheets are built once per theme and shared by every widget using them
+THEME_STYLES = {name: _theme_styles(t["bg"], t["fg"]) for name, t in THEMES.items()}
+
+# --- Response Cache ---
+
+# In-memory LRU of exact prompt -> answer, keyed by prompt_key()
+_PROMPT_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def prompt_key(prompt):
+    return hashlib.sha256((OLLAMA_MODEL + "\x00" + prompt).encode("utf-8")).hexdigest()
+
+
+def get_cached_prompt(key):
+    with _CACHE_LOCK:
+        if key not in _PROMPT_CACHE:
+            return None
+        _PROMPT_CACHE.move_to_end(key)
+        return _PROMPT_CACHE[key]
+
+
+def cache_prompt(key, response):
+    with _CACHE_LOCK:
+        _PROMPT_CACHE[key] = response
+        _PROMPT_CACHE.move_to_end(key)
+        while len(_PROMPT_CACHE) > PROMPT_CACHE_SIZE:
+            _PROMPT_CACHE.popitem(last=False)
+
+
+def load_prompt_cache():
+    """Restore the exact-match cache saved by a previous session."""
+    try:
+        with open(PROMPT_CACHE_FILE, "rb") as f:
+            entries = _loads(f.read())
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        logging.error(f"[Error loading prompt cache: {e}]")
+        return
+    if not isinstance(entries, dict):
+        logging.error(f"[Ignoring prompt cache: expected an object, got {type(entries).__name__}]")
+        return
+    for key, response in entries.items():
+        if isinstance(response, str):
+            cache_prompt(key, response)
+
+
+def save_prompt_cache():
+    with _CACHE_LOCK:
+        entries = dict(_PROMPT_CACHE)
+    try:
+        atomic_write(PROMPT_CACHE_FILE, _dumps(entries))
+    except Exception as e:
+        logging.error(f"[Error saving prompt cache: {e}]")
+
+
+def fetch_embedding(text, session=requests):
+    """Return the Ollama embedding for text, or None if it can't be fetched."""
+    try:
+        r = session.post(OLLAMA_EMBED_URL, json={"model": OLLAMA_MODEL, "prompt": text}, timeout=10)
+        r.raise_for_status()
+        return r.json().get("embedding") or None
+    except Exception as e:
+        logging.error(f"[Error fetching Ollama embedding: {e}]")
+        return None
+
+
+class ResponseCache:
+    """SQLite store of past answers, matched by exact prompt or embedding similarity."""
+
+    def __init__(self, path=CACHE_FILE):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT, embedding BLOB, prompt TEXT, response TEXT, ts REAL)"
+        )
+        self.db.commit()
+        # Unit-length embeddings for the current model, loaded on first similarity lookup
+        self._loaded = False
+        self._matrix = None
+        self._responses = []
+        # Embeddings computed ahead of time for prompts the user may send next
+        self._pending = OrderedDict()
+
+    def embedding_for(self, prompt):
+        with self.lock:
+            return self._pending.pop(prompt, None)
+
+    def precompute(self, prompts):
+        with self.lock:
+            if not self._loaded:
+                self._load()
+        for prompt in prompts:
+            embedding = fetch_embedding(prompt)
+            if embedding is None:
+                continue
+            with self.lock:
+                self._pending[prompt] = embedding
+                while len(self._pending) > 16:
+                    self._pending.popitem(last=False)
+
+    def has_embedding(self, prompt):
+        with self.lock:
+            return prompt in self._pending
+
+    def get_exact(self, prompt):
+        with self.lock:
+            row = self.db.execute("SELECT response FROM responses WHERE key = ?", (prompt_key(prompt),)).fetchone()
+        return row[0] if row else None
+
+    def get_similar(self, embedding):
+        if np is None or embedding is None:
+            return None
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if not norm:
+            return None
+        with self.lock:
+            if not self._loaded:
+                self._load()
+            if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+                return None
+            sims = self._matrix @ (query / norm)
+            idx = int(sims.argmax())
+            if sims[idx] > CACHE_SIMILARITY:
+                logging.debug(f"Semantic cache hit (similarity {sims[idx]:.3f})")
+                return self._responses[idx]
+        return None
+
+    def add(self, prompt, embedding, response):
+        vector = None
+        if np is not None and embedding is not None:
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm else None
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, embedding, prompt, response, ts) VALUES (?, ?, ?, ?, ?, ?)",
+                (prompt_key(prompt), OLLAMA_MODEL, vector.tobytes() if vector is not None else None, prompt, response, time.time())
+            )
+            self.db.commit()
+            if self._loaded and vector is not None:
+                self._matrix = vector[None, :] if self._matrix is None else np.vstack([self._matrix, vector])
+                self._responses.append(response)
+
+    def _load(self):
+        rows = self.db.execute(
+            "SELECT embedding, response FROM responses WHERE model = ? AND embedding IS NOT NULL", (OLLAMA_MODEL,)
+        ).fetchall()
+        if rows:
+            self._matrix = np.vstack([np.frombuffer(blob, dtype=np.float32) for blob, _ in rows])
+            self._responses = [response for _, response in rows]
+        self._loaded = True
+
+
 # --- Async Chat Worker ---
 
+def iter_ndjson(response, chunk_size=65536):
+    """Yield raw NDJSON lines from a streamed response, reading large chunks into one buffer."""
+    buf = bytearray()
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        buf += chunk
+        # Split every complete line in the buffer at once; keep the unterminated tail
+        nl = buf.rfind(b"\n")
+        if nl < 0:
+            continue
+        lines = bytes(buf[:nl]).splitlines()
+        del buf[:nl + 1]
+        yield from filter(None, lines)
+    if buf.strip():
+        yield bytes(buf)
+
+
+# Ollama chunks have a known flat shape, so the fields we need can be sliced out
+# without building Python objects for the rest (durations, counts, context ids).
+_CONTENT_RE = re.compile(rb'"content"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_DONE_RE = re.compile(rb'"done"\s*:\s*true')
+
+
+def parse_chunk(line):
+    """Return (content, error, done) for one stream line."""
+    if b'"error"' not in line:
+        match = _CONTENT_RE.search(line)
+        if match:
+            return _loads(b'"' + match.group(1) + b'"'), None, _DONE_RE.search(line) is not None
+    data = _loads(line)
+    message = data.get("message") or {}
+    return message.get("content", ""), data.get("error"), bool(data.get("done"))
+
+
 class OllamaWorker(QThread):
+    """Long-lived chat thread that answers prompts taken from a queue; None stops it.
+
+    abort() makes an in-flight answer give up: the stream loop checks `stopping` on every
+    line and the current response and session are closed. A read that is already blocked
+    still returns within its request timeout.
+    """
     result = pyqtSignal(str)
+    chunk = pyqtSignal(str)
     error = pyqtSignal(str)
 
-    def __init__(self, prompt):
+    def __init__(self, prompts, cache=None):
         super().__init__()
-        self.prompt = prompt
+        self.prompts = prompts
+        self.cache = cache
+        self.stopping = threading.Event()
+        self.session = requests.Session()
+        self._response = None
+
+    def abort(self):
+        self.stopping.set()
+        response = self._response
+        if response is not None:
+            response.close()
+        self.session.close()
 
     def run(self):
+        while True:
+            prompt = self.prompts.get()
+            if prompt is None or self.stopping.is_set():
+                break
+            self.ask(prompt)
+
+    def ask(self, prompt):
         try:
+            key = prompt_key(prompt)
+            cached = get_cached_prompt(key)
+            embedding = None
+            if cached is None and self.cache:
+                # Exact repeats skip the embedding round-trip entirely
+                cached = self.cache.get_exact(prompt)
+                if cached is not None:
+                    cache_prompt(key, cached)
+                elif np is not None:
+                    # Similar-prompt hits are served but never promoted to the exact cache
+                    embedding = self.cache.embedding_for(prompt) or fetch_embedding(prompt, self.session)
+                    cached = self.cache.get_similar(embedding)
+            if cached is not None:
+                self.result.emit(cached)
+                return
             payload = {
                 "model": OLLAMA_MODEL,
                 "messages": [
-                    {"role": "user", "content": self.prompt}
+                    {"role": "user", "content": prompt}
                 ]
             }
             logging.debug(f"Sending to Ollama: {payload}")
-            r = requests.post(OLLAMA_API_URL, json=payload, timeout=60, stream=True)
-            r.raise_for_status()
-            full_content = ""
+            pieces = []
             last_data = None
-            for line in r.iter_lines():
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line.decode('utf-8'))
-                    last_data = data
-                    logging.debug(f"[Ollama API stream] {data}")
-                    if "error" in data:
-                        self.error.emit(f"[Ollama error: {data['error']}]\nRaw: {data}")
+            if self.stopping.is_set():
+                return
+            with self.session.post(OLLAMA_API_URL, json=payload, timeout=60, stream=True) as r:
+                self._response = r
+                r.raise_for_status()
+                for line in iter_ndjson(r):
+                    if self.stopping.is_set():
                         return
-                    if "message" in data and data["message"].get("content"):
-                        full_content += data["message"]["content"]
-                except Exception as e:
-                    logging.error(f"[Error parsing Ollama stream: {e}")
-            if full_content.strip():
-                self.result.emit(full_content.strip())
+                    try:
+                        content, error, done = parse_chunk(line)
+                        last_data = line
+                        logging.debug("[Ollama API stream] %s", line)
+                        if error:
+                            self.error.emit(f"[Ollama error: {error}]\nRaw: {line.decode('utf-8', 'replace')}")
+                            return
+                        if content:
+                            pieces.append(content)
+                            self.chunk.emit(content)
+                        if done:
+                            break
+                    except Exception as e:
+                        logging.error(f"[Error parsing Ollama stream: {e}")
+            full_content = "".join(pieces).strip()
+            if full_content:
+                cache_prompt(key, full_content)
+                if self.cache:
+                    self.cache.add(prompt, embedding, full_content)
+                self.result.emit(full_content)
             elif last_data:
-                self.error.emit(f"[No valid response from Ollama]\nRaw: {last_data}")
+                self.error.emit(f"[No valid response from Ollama]\nRaw: {last_data.decode('utf-8', 'replace')}")
             else:
                 self.error.emit("[No response from Ollama]")
         except Exception as e:
+            if self.stopping.is_set():
+                return  # Aborted on quit; nothing left to report to
             logging.error(f"[Error calling Ollama API: {e}")
             self.error.emit(f"[Error calling Ollama API: {e}]")
+        finally:
+            self._response = None
 
 
 class OnboardingDialog(QDialog):
@@ -93,9 +406,8 @@ class OnboardingDialog(QDialog):
         super().__init__(parent)
         self.setWindowTitle("Welcome to RoboSwish!")
         self.setMinimumWidth(420)
-        icon_path = os.path.join(os.path.dirname(__file__), "public/images/roboswish_angle.png")
-        if os.path.exists(icon_path):
-            self.setWindowIcon(QIcon(icon_path))
+        if _ICON_EXISTS:
+            self.setWindowIcon(app_icon())
 
         # Main layout
         layout = QVBoxLayout()
@@ -207,6 +519,22 @@ class SettingsDialog(QDialog):
     def get_settings(self):
         return self.browser_input.text(), self.ollama_url_input.text(), self.ollama_model_input.text()
 
+# Chat markup, filled with str.replace("{MSG}", ...) on every append
+# Bright green for user, glowing light blue for LLM (Robo)
+_USER_TMPL = (
+    "<div style='margin:8px 0;'><b style='color:#00FF88;'>You:</b> "
+    "<span style='color:#00FF88;font-weight:bold;'>{MSG}</span></div>"
+)
+_BOT_TMPL = (
+    "<div style='margin:8px 0;'><b style='color:#4FC3F7;text-shadow:0 0 8px #B3E5FC;'>Robo:</b> "
+    "<span style='color:#4FC3F7;text-shadow:0 0 8px #B3E5FC;font-weight:bold;'>{MSG}</span></div>"
+)
+
+
+def _escape_message(text):
+    return html.escape(text).replace("\n", "<br>")
+
+
 class ChatSidebar(QWidget):
     def __init__(self):
         super().__init__()
@@ -235,7 +563,29 @@ class ChatSidebar(QWidget):
         self.layout.addWidget(self.close_btn)
         self.setLayout(self.layout)
 
-        self.worker = None
+        self._stream_cursor = None  # end of the Robo message being streamed, if any
+        self._stream_format = None
+        self._thinking_block = None  # the "Thinking..." placeholder awaiting removal
+        try:
+            self.cache = ResponseCache()
+        except sqlite3.Error as e:
+            logging.error(f"[Error opening response cache: {e}]")
+            self.cache = None
+
+        # One chat thread for the whole session; send_message just queues prompts
+        self._queue = queue.Queue()
+        self.worker = OllamaWorker(self._queue, self.cache)
+        self.worker.chunk.connect(self.handle_chunk, Qt.QueuedConnection)
+        self.worker.result.connect(self.handle_result, Qt.QueuedConnection)
+        self.worker.error.connect(self.handle_error, Qt.QueuedConnection)
+        self.worker.start()
+
+        # Embed the draft prompt during idle time so the cache lookup needs no HTTP call (opt-in)
+        self._precompute_thread = None
+        self._idle_timer = QTimer(self)
+        self._idle_timer.timeout.connect(self.precompute_embeddings)
+        if PRECOMPUTE_EMBEDDINGS and self.cache and np is not None:
+            self._idle_timer.start(PRECOMPUTE_INTERVAL_MS)
 
     def close_sidebar(self):
         self.setVisible(False)
@@ -249,67 +599,76 @@ class ChatSidebar(QWidget):
         self.chat_input.clear()
         self.send_btn.setEnabled(False)
         self.chat_input.setEnabled(False)
-        self.append_message("Robo", "<i>Thinking...</i>")
-        try:
-            self.worker = OllamaWorker(user_text)
-            self.worker.result.connect(self.handle_result)
-            self.worker.error.connect(self.handle_error)
-            self.worker.start()
-        except Exception as e:
-            self.append_message("Robo", f"<span style='color:red;'>[Failed to start chat worker: {e}]</span>")
-            QMessageBox.critical(self, "Chat Error", f"Failed to start chat worker thread.\n{e}")
-
-    def handle_result(self, message):
-        # Remove last "Thinking..." message
-        cursor = self.chat_history.textCursor()
-        cursor.movePosition(cursor.End)
-        cursor.select(cursor.BlockUnderCursor)
+        self.append_message("Robo", "<i>Thinking...</i>", escape=False)
+        self._thinking_block = self.chat_history.document().lastBlock()
+        self._stream_cursor = None
+        self._queue.put(user_text)
+
+    def precompute_embeddings(self):
+        if not self.send_btn.isEnabled():
+            return  # A reply is in flight
+        if self._precompute_thread and self._precompute_thread.is_alive():
+            return
+        draft = self.chat_input.text().strip()
+        if (draft and len(draft) <= PRECOMPUTE_MAX_CHARS and not self.cache.has_embedding(draft)
+                and get_cached_prompt(prompt_key(draft)) is None):
+            self._precompute_thread = threading.Thread(target=self.cache.precompute, args=([draft],), daemon=True)
+            self._precompute_thread.start()
+
+    def stop_worker(self):
+        # Abandon any answer in flight, then wait: Qt aborts if a running QThread is destroyed
+        self.worker.abort()
+        self._queue.put(None)
+        self.worker.wait()
+
+    def _remove_thinking(self):
+        # Remove the "Thinking..." block captured in send_message, separator included
+        block, self._thinking_block = self._thinking_block, None
+        if block is None or not block.isValid():
+            return
+        cursor = QTextCursor(block)
+        cursor.select(QTextCursor.BlockUnderCursor)
         cursor.removeSelectedText()
-        cursor.deletePreviousChar()  # Remove newline
-        self.chat_history.setTextCursor(cursor)
-        self.append_message("Robo", message)
+
+    def handle_chunk(self, text):
+        # The first token replaces "Thinking..." with a Robo message that later tokens extend in place
+        if self._stream_cursor is None:
+            self._remove_thinking()
+            self.append_message("Robo", "")
+            self._stream_cursor = QTextCursor(self.chat_history.document())
+            self._stream_cursor.movePosition(QTextCursor.End)
+            # Plain-text inserts keep each token's leading space, which insertHtml would drop
+            self._stream_format = QTextCharFormat()
+            self._stream_format.setForeground(QColor("#4FC3F7"))
+            self._stream_format.setFontWeight(QFont.Bold)
+        self._stream_cursor.insertText(text, self._stream_format)
+        scrollbar = self.chat_history.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def _finish_reply(self):
+        self._remove_thinking()
+        self._stream_cursor = None
         self.send_btn.setEnabled(True)
         self.chat_input.setEnabled(True)
 
     def handle_error(self, message):
-        # Remove last "Thinking..." message
-        cursor = self.chat_history.textCursor()
-        cursor.movePosition(cursor.End)
-        cursor.select(cursor.BlockUnderCursor)
-        cursor.removeSelectedText()
-        cursor.deletePreviousChar()  # Remove newline
-        self.chat_history.setTextCursor(cursor)
-        self.append_message("Robo", f"<span style='color:red;'>{message}</span>")
-        self.send_btn.setEnabled(True)
-        self.chat_input.setEnabled(True)
+        self._finish_reply()
+        self.append_message("Robo", f"<span style='color:red;'>{_escape_message(message)}</span>", escape=False)
         # Also show a popup for critical errors
         QMessageBox.critical(self, "Ollama Chat Error", message)
 
     def handle_result(self, message):
-        # Remove last "Thinking..." message
-        cursor = self.chat_history.textCursor()
-        cursor.movePosition(cursor.End)
-        cursor.select(cursor.BlockUnderCursor)
-        cursor.removeSelectedText()
-        cursor.deletePreviousChar()  # Remove newline
-        self.chat_history.setTextCursor(cursor)
-        self.append_message("Robo", message)
-        self.send_btn.setEnabled(True)
-        self.chat_input.setEnabled(True)
+        # Streamed answers are already on screen; cache hits arrive whole
+        if self._stream_cursor is None:
+            self._remove_thinking()
+            self.append_message("Robo", message)
+        self._finish_reply()
+
+    def append_message(self, sender, message, escape=True):
+        # Messages are plain text unless escape=False marks them as our own markup
+        tmpl = _USER_TMPL if sender == "You" else _BOT_TMPL
+        self.chat_history.append(tmpl.replace("{MSG}", _escape_message(message) if escape else message))
 
-    def append_message(self, sender, message):
-        if sender == "You":
-            # Bright green for user
-            self.chat_history.append(
-                "<div style='margin:8px 0;'><b style='color:#00FF88;'>You:</b> "
-                "<span style='color:#00FF88;font-weight:bold;'>{}</span></div>".format(message)
-            )
-        else:
-            # Glowing light blue for LLM (Robo)
-            self.chat_history.append(
-                "<div style='margin:8px 0;'><b style='color:#4FC3F7;text-shadow:0 0 8px #B3E5FC;'>Robo:</b> "
-                "<span style='color:#4FC3F7;text-shadow:0 0 8px #B3E5FC;font-weight:bold;'>{}</span></div>".format(message)
-            )
 class ModeEditorDialog(QDialog):
     def __init__(self, parent, modes):
         super().__init__(parent)
@@ -375,6 +734,14 @@ class ModeEditorDialog(QDialog):
 
 def check_ollama_available(model_name="llama2"):
     """Check if Ollama API is reachable and the model is available."""
+    # A recent successful probe for the same model is trusted; failures are always re-checked
+    try:
+        with open(PROBE_CACHE_FILE, "rb") as f:
+            probe = _loads(f.read())
+        if probe.get("ok") and probe.get("model") == model_name and time.time() - probe.get("ts", 0) < PROBE_CACHE_TTL:
+            return True, None
+    except Exception:
+        pass
     try:
         # Try a simple /api/tags call to see if Ollama is up
         r = requests.get("http://localhost:11434/api/tags", timeout=3)
@@ -382,9 +749,39 @@ def check_ollama_available(model_name="llama2"):
         tags = r.json().get("models", [])
         if not any(model_name in m.get("name", "") for m in tags):
             return False, f"Model '{model_name}' not found in Ollama. Run: ollama pull {model_name}"
-        return True, None
     except Exception as e:
         return False, f"Ollama API not reachable: {e}"
+    try:
+        atomic_write(PROBE_CACHE_FILE, _dumps({"ts": time.time(), "ok": True, "msg": None, "model": model_name}))
+    except Exception as e:
+        logging.error(f"[Error saving Ollama probe: {e}]")
+    return True, None
+
+
+_OLLAMA_PROBE = None
+
+
+def start_ollama_probe():
+    """Run check_ollama_available in the background once and return its Future."""
+    global _OLLAMA_PROBE
+    if _OLLAMA_PROBE is None:
+        probe = _OLLAMA_PROBE = Future()
+
+        def run():
+            probe.set_result(check_ollama_available(OLLAMA_MODEL))
+        threading.Thread(target=run, daemon=True).start()
+    return _OLLAMA_PROBE
+
+
+def warm_ollama_model():
+    """Ask Ollama to load the chat model now and keep it resident for the session."""
+    try:
+        # An empty message list loads the model without generating anything
+        payload = {"model": OLLAMA_MODEL, "messages": [], "keep_alive": "30m", "stream": False}
+        requests.post(OLLAMA_API_URL, json=payload, timeout=30).raise_for_status()
+        logging.debug(f"Warmed Ollama model {OLLAMA_MODEL}")
+    except Exception as e:
+        logging.error(f"[Error warming Ollama model: {e}]")
 
 
 class RoboSwish(QWidget):
@@ -398,15 +795,14 @@ class RoboSwish(QWidget):
         self.focus_timer = None
         self.time_left = FOCUS_BURST_SECONDS
 
-        icon_path = os.path.join(os.path.dirname(__file__), "public/images/roboswish_angle.png")
-        if os.path.exists(icon_path):
-            self.setWindowIcon(QIcon(icon_path))
+        if _ICON_EXISTS:
+            self.setWindowIcon(app_icon())
 
         # Onboarding dialog
-        if not os.path.exists(".roboswish_onboarded"):
+        if not _ONBOARDED:
             dlg = OnboardingDialog(self)
             if dlg.exec_() == QDialog.Accepted:
-                with open(".roboswish_onboarded", "w") as f:
+                with open(ONBOARDED_FILE, "w") as f:
                     f.write("onboarded\n")
 
         self.initUI()
@@ -423,13 +819,19 @@ class RoboSwish(QWidget):
         if dlg.exec_() == QDialog.Accepted:
             browser, url, model = dlg.get_settings()
             # Save to .env
-            with open(".env", "w") as f:
-                f.write(f"BROWSER_COMMAND={browser}\nOLLAMA_API_URL={url}\nOLLAMA_MODEL={model}\n")
+            env = f"BROWSER_COMMAND={browser}\nOLLAMA_API_URL={url}\nOLLAMA_MODEL={model}\n"
+            if WARM_MODEL:
+                env += "WARM_MODEL=1\n"
+            if PRECOMPUTE_EMBEDDINGS:
+                env += "PRECOMPUTE_EMBEDDINGS=1\n"
+            atomic_write(".env", env.encode("utf-8"))
             QMessageBox.information(self, "Settings Saved", "Restart RoboSwish to apply new settings.")
 
     def check_ollama_status(self):
         def do_check():
-            ok, msg = check_ollama_available()
+            ok, msg = start_ollama_probe().result()
+            if ok and WARM_MODEL:
+                warm_ollama_model()
             if not ok:
                 def show():
                     QMessageBox.warning(self, "Ollama Not Available", f"RoboSwish AI chat will not work.\n\n{msg}")
@@ -451,6 +853,7 @@ class RoboSwish(QWidget):
 
         self.mode_buttons = []
         self.modes = {}
+        self._modes_stat = None  # (inode, mtime_ns, size) of MODES_FILE when last loaded
 
         # Mode editor button
         self.edit_modes_btn = QPushButton("Edit Modes")
@@ -473,7 +876,8 @@ class RoboSwish(QWidget):
         self.left_layout.addWidget(QLabel("Switch Theme:"))
         for theme_name in THEMES.keys():
             btn = QPushButton(theme_name)
-            btn.clicked.connect(lambda checked, t=theme_name: self.switch_theme(t))
+            btn.setProperty("theme", theme_name)
+            btn.clicked.connect(self._dispatch_theme)
             self.left_layout.addWidget(btn)
 
         self.left_layout.addStretch()
@@ -489,59 +893,99 @@ class RoboSwish(QWidget):
         splitter.setStretchFactor(1, 2)
         self.main_layout.addWidget(splitter)
 
+    @staticmethod
+    def _stat_modes_file():
+        st = os.stat(MODES_FILE)
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
     def load_modes(self):
+        # Re-run before each edit; an unchanged file costs one stat, an external edit is picked up
         try:
-            with open(MODES_FILE, "r") as f:
-                self.modes = json.load(f)
+            stat_key = self._stat_modes_file()
+            if stat_key == self._modes_stat:
+                return  # Unchanged since the last load
+            with open(MODES_FILE, "rb") as f:
+                modes = _loads(f.read())
+            self._modes_stat = stat_key
         except Exception as e:
             self.left_layout.addWidget(QLabel(f"Error loading modes: {e}"))
-            self.modes = {}
-
-        # Create buttons for each mode
-        # Remove old mode buttons
-        for btn in getattr(self, 'mode_buttons', []):
+            modes = {}
+            self._modes_stat = None
+        self.update_mode_buttons(modes)
+
+    def update_mode_buttons(self, modes):
+        # Only added, removed or re-pointed modes touch their widgets
+        styles = THEME_STYLES.get(self.current_theme, THEME_STYLES["RoboSwish Default"])
+        buttons = dict(zip(self.modes, self.mode_buttons))
+        for mode_name in self.modes.keys() - modes.keys():
+            btn = buttons.pop(mode_name)
             self.left_layout.removeWidget(btn)
             btn.deleteLater()
         self.mode_buttons = []
         insert_at = 2  # After title and edit button
-        for mode_name, urls in self.modes.items():
-            btn = QPushButton(mode_name)
-            btn.clicked.connect(lambda checked, u=urls: self.launch_mode(u))
-            self.left_layout.insertWidget(insert_at, btn)
+        for mode_name, urls in modes.items():
+            btn = buttons.get(mode_name)
+            if btn is None:
+                btn = QPushButton(mode_name)
+                btn.setStyleSheet(styles["button"])
+                btn.setEnabled(self.focus_timer is None)
+                btn.setProperty("urls", urls)
+                btn.clicked.connect(self._dispatch_mode)
+            elif urls != self.modes[mode_name]:
+                btn.setProperty("urls", urls)
+            if self.left_layout.indexOf(btn) != insert_at:
+                self.left_layout.removeWidget(btn)
+                self.left_layout.insertWidget(insert_at, btn)
             self.mode_buttons.append(btn)
             insert_at += 1
+        self.modes = modes
+
     def open_mode_editor(self):
+        # Start from the file as it is now, in case it was edited outside the app
+        self.load_modes()
         dlg = ModeEditorDialog(self, self.modes)
         if dlg.exec_() == QDialog.Accepted:
-            self.modes = dlg.get_modes()
-            # Save to file
+            modes = dlg.get_modes()
+            if modes == self.modes:
+                return
             try:
-                with open(MODES_FILE, "w") as f:
-                    json.dump(self.modes, f, indent=2)
+                atomic_write(MODES_FILE, _dumps(modes))
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Failed to save modes: {e}")
-            self.load_modes()
+                return
+            self.update_mode_buttons(modes)
+            try:
+                self._modes_stat = self._stat_modes_file()
+            except OSError:
+                self._modes_stat = None
 
     def apply_theme(self):
-        theme = THEMES.get(self.current_theme, THEMES["RoboSwish Default"])
-        bg = theme["bg"]
-        fg = theme["fg"]
+        styles = THEME_STYLES.get(self.current_theme, THEME_STYLES["RoboSwish Default"])
 
-        self.setStyleSheet(f"background-color: {bg}; color: {fg};")
-        self.title_label.setStyleSheet(f"font-size: 20px; font-weight: bold; color: {fg};")
+        self.setStyleSheet(styles["panel"])
+        self.title_label.setStyleSheet(styles["title"])
 
         for btn in self.mode_buttons + [self.focus_btn]:
-            btn.setStyleSheet(f"background-color: #15232e; color: {fg}; padding: 10px;")
+            btn.setStyleSheet(styles["button"])
 
-        self.timer_label.setStyleSheet(f"font-size: 18px; font-weight: bold; color: {fg};")
+        self.timer_label.setStyleSheet(styles["timer"])
 
         # Also style chat sidebar colors dynamically
-        self.chat_sidebar.setStyleSheet(f"background-color: {bg}; color: {fg};")
-        self.chat_sidebar.chat_history.setStyleSheet(f"background-color: #181818; color: {fg}; padding: 5px;")
-        self.chat_sidebar.chat_input.setStyleSheet(f"background-color: #222; color: {fg}; padding: 5px;")
-        self.chat_sidebar.send_btn.setStyleSheet(f"background-color: #004d2e; color: {fg}; padding: 5px;")
+        self.chat_sidebar.setStyleSheet(styles["panel"])
+        self.chat_sidebar.chat_history.setStyleSheet(styles["chat_history"])
+        self.chat_sidebar.chat_input.setStyleSheet(styles["chat_input"])
+        self.chat_sidebar.send_btn.setStyleSheet(styles["send_btn"])
+
+    # Shared slots for the mode and theme buttons; each button carries its target as a property
+    def _dispatch_mode(self):
+        self.launch_mode(self.sender().property("urls"))
+
+    def _dispatch_theme(self):
+        self.switch_theme(self.sender().property("theme"))
 
     def switch_theme(self, theme_name):
+        if theme_name == self.current_theme:
+            return
         self.current_theme = theme_name
         self.apply_theme()
 
@@ -550,7 +994,12 @@ class RoboSwish(QWidget):
             return
         command = [BROWSER_COMMAND, "--new-window"] + urls
         try:
-            subprocess.Popen(command)
+            if hasattr(os, "posix_spawnp"):
+                # Spawn without fork() so the Qt process memory isn't duplicated
+                pid = os.posix_spawnp(BROWSER_COMMAND, command, os.environ)
+                threading.Thread(target=os.waitpid, args=(pid, 0), daemon=True).start()
+            else:
+                subprocess.Popen(command)
         except Exception as e:
             print(f"Failed to launch browser: {e}")
 
@@ -559,6 +1008,8 @@ class RoboSwish(QWidget):
             return  # Already running
 
         self.time_left = FOCUS_BURST_SECONDS
+        # Count down against the wall clock so a stalled event loop can't stretch the burst
+        self._deadline = time.monotonic() + FOCUS_BURST_SECONDS
         self.update_timer_label()
         self.focus_btn.setEnabled(False)
         for btn in self.mode_buttons:
@@ -566,12 +1017,14 @@ class RoboSwish(QWidget):
 
         self.focus_timer = QTimer()
         self.focus_timer.timeout.connect(self.tick)
-        self.focus_timer.start(1000)
+        self.focus_timer.start(250)
 
     def tick(self):
-        self.time_left -= 1
-        self.update_timer_label()
-        if self.time_left <= 0:
+        remaining = max(0, math.ceil(self._deadline - time.monotonic()))
+        if remaining != self.time_left:
+            self.time_left = remaining
+            self.update_timer_label()
+        if remaining <= 0:
             self.focus_timer.stop()
             self.focus_timer = None
             self.timer_label.setText("")
@@ -587,7 +1040,12 @@ class RoboSwish(QWidget):
 
 
 if __name__ == "__main__":
+    # Probe Ollama while Qt starts up and the window is built
+    start_ollama_probe()
+    load_prompt_cache()
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(save_prompt_cache)
     swish = RoboSwish()
+    app.aboutToQuit.connect(swish.chat_sidebar.stop_worker)
     swish.show()
     sys.exit(app.exec_())